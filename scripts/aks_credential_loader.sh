@@ -118,22 +118,16 @@ process_subscription() {
     log_info "Subscription ID: $sub_id"
     log_info "============================================================"
 
-    # Set subscription context
-    if ! execute_command "az account set --subscription '$sub_id'" "Set subscription context"; then
-        if [[ "$DRY_RUN" != "true" ]]; then
-            log_error "Failed to set subscription context, skipping..."
-            return 0
-        fi
-    fi
-
+    # The subscription is passed to each az call instead of changing the
+    # shared CLI profile with 'az account set'
     # Get AKS clusters
     local clusters_json
     if [[ "$DRY_RUN" == "true" ]]; then
-        log_info "[DRY RUN] Would execute: az aks list --output json"
+        log_info "[DRY RUN] Would execute: az aks list --subscription '$sub_id' --output json"
         # Sample cluster data for dry run
         clusters_json='[{"name":"sample-aks-cluster","resourceGroup":"sample-rg"}]'
     else
-        if ! clusters_json=$(az aks list --output json 2>/dev/null); then
+        if ! clusters_json=$(az aks list --subscription "$sub_id" --output json 2>/dev/null); then
             log_warn "Failed to list AKS clusters in subscription $sub_id"
             return 0
         fi
@@ -162,7 +156,7 @@ process_subscription() {
             total_clusters=$((total_clusters + 1))
 
             # Fetch credentials
-            local get_creds_cmd="az aks get-credentials --resource-group '$resource_group' --name '$cluster_name' --overwrite-existing"
+            local get_creds_cmd="az aks get-credentials --subscription '$sub_id' --resource-group '$resource_group' --name '$cluster_name' --overwrite-existing"
             if execute_command "$get_creds_cmd" "Get AKS credentials for $cluster_name"; then
                 # Convert kubeconfig
                 local kubelogin_cmd="kubelogin convert-kubeconfig -l azurecli"
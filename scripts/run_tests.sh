@@ -11,7 +11,7 @@ export PATH="/usr/local/bin:/opt/homebrew/bin:/usr/bin:$PATH"
 # Run pytest with system PATH available
 if [ $# -eq 0 ]; then
     # Default: run safe tests only
-    python -m pytest tests/test_simple.py tests/test_isolated.py -v
+    python -m pytest tests/test_simple.py tests/test_aks_credential_loader.py -v
 else
     # Run with provided arguments
     python -m pytest "$@"
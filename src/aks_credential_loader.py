@@ -6,21 +6,377 @@ A tool to automatically discover AKS clusters across all Azure subscriptions
 and fetch their credentials for kubectl access.
 """
 
-import argparse
+import importlib
 import json
 import logging
+import os
+import re
+import shutil
 import subprocess
 import sys
-from typing import List, Dict, Optional, Any, Union
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 import time
+import urllib.parse
+from types import ModuleType
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# http.client, ssl, base64, tempfile and PyYAML are slow to import and only
+# needed once credentials are fetched, so they are imported where they are used
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    import http.client
+    import ssl
+
+# Upper bound on concurrent `az aks list` calls during cluster discovery
+MAX_DISCOVERY_WORKERS = 16
+
+# Resource Graph query returning every AKS cluster visible to the signed-in account
+AKS_GRAPH_QUERY = (
+    "Resources"
+    " | where type =~ 'microsoft.containerservice/managedclusters'"
+    " | project id, name, resourceGroup, subscriptionId"
+)
+
+# Maximum rows per Resource Graph page
+GRAPH_PAGE_SIZE = 1000
+
+# Upper bound on concurrent credential fetches (requires PyYAML for merging)
+MAX_CREDENTIAL_WORKERS = 5
+
+# Throttled az calls are retried with exponential backoff (1s, 2s, 4s, ...)
+MAX_THROTTLE_RETRIES = 5
+THROTTLE_PATTERN = re.compile(r"TooManyRequests|Too Many Requests|\b429\b")
+
+# Managed cluster REST API used to fetch credentials without spawning az
+AKS_API_VERSION = "2024-02-01"
+ARM_TIMEOUT_SECONDS = 30
+
+# Idle ARM connections kept open per host, shared by every worker thread
+ARM_POOL_SIZE = MAX_CREDENTIAL_WORKERS
+
+# CA bundle settings honoured by az (through requests), checked in this order
+CA_BUNDLE_VARIABLES = ("REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE")
+
+# `az aks get-credentials` always writes here unless --file is given
+DEFAULT_KUBECONFIG = os.path.join(os.path.expanduser("~"), ".kube", "config")
+
+KUBECONFIG_SECTIONS = ("clusters", "contexts", "users")
+
+# Extra subprocess.run arguments: on Windows, don't create a console window per process
+SUBPROCESS_KWARGS: Dict[str, Any] = (
+    {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)} if sys.platform == "win32" else {}
+)
+
+
+# dataclass can only add __slots__ itself from Python 3.10; hand-written slots
+# would clash with the default of the get_credentials_args field
+DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
+class Cluster:
+    """An AKS cluster found during discovery, with its `az aks get-credentials` arguments."""
+
+    name: str
+    resource_group: str
+    subscription_id: str
+    get_credentials_args: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        get_credentials_args = (
+            "aks",
+            "get-credentials",
+            "--subscription",
+            self.subscription_id,
+            "--resource-group",
+            self.resource_group,
+            "--name",
+            self.name,
+            "--overwrite-existing",
+        )
+        object.__setattr__(self, "get_credentials_args", get_credentials_args)
+
+    @classmethod
+    def from_json(cls, subscription_id: str, data: Dict[str, Any]) -> "Cluster":
+        """Build a cluster from an `az aks list` or Resource Graph row."""
+        return cls(
+            name=data.get("name", "Unknown"),
+            resource_group=data.get("resourceGroup", "Unknown"),
+            subscription_id=subscription_id,
+        )
+
+
+def parse_json(data: Union[bytes, str]) -> Any:
+    """Parse JSON output with orjson when installed; errors are json.JSONDecodeError either way."""
+    if orjson is not None:
+        return orjson.loads(data)  # pylint: disable=no-member
+    return json.loads(data)
+
+
+def merge_kubeconfig(existing: Dict[str, Any], addition: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge one kubeconfig into another, replacing entries that share a name."""
+    merged = dict(existing)
+    merged.setdefault("apiVersion", addition.get("apiVersion", "v1"))
+    merged.setdefault("kind", "Config")
+
+    for section in KUBECONFIG_SECTIONS:
+        entries = {entry.get("name"): entry for entry in existing.get(section) or []}
+        for entry in addition.get(section) or []:
+            entries[entry.get("name")] = entry
+        merged[section] = list(entries.values())
+
+    if addition.get("current-context"):
+        merged["current-context"] = addition["current-context"]
+
+    return merged
+
+
+def convert_kubeconfig_to_azurecli(kubeconfig: Dict[str, Any]) -> Dict[str, Any]:
+    """Switch kubelogin exec users to Azure CLI login in place, matching kubelogin -l azurecli."""
+    for user in kubeconfig.get("users") or []:
+        exec_config = (user.get("user") or {}).get("exec") or {}
+        if os.path.basename(str(exec_config.get("command", ""))) != "kubelogin":
+            continue
+
+        args = [str(arg) for arg in exec_config.get("args") or []]
+        if "--server-id" not in args[:-1]:
+            continue
+
+        server_id = args[args.index("--server-id") + 1]
+        exec_config["args"] = ["get-token", "--login", "azurecli", "--server-id", server_id]
+
+    return kubeconfig
+
+
+def import_yaml() -> Optional[ModuleType]:
+    """Import PyYAML on first use, or return None if it isn't installed."""
+    try:
+        return importlib.import_module("yaml")
+    except ImportError:
+        return None
+
+
+def load_kubeconfig(path: str) -> Dict[str, Any]:
+    """Load a kubeconfig file, treating a missing or empty file as empty."""
+    import yaml
+
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return yaml.safe_load(handle) or {}
+
+
+def write_merged_kubeconfig(path: str, addition: Dict[str, Any]) -> None:
+    """Merge a kubeconfig into the file at path atomically, keeping a symlink's link."""
+    import tempfile
+
+    import yaml
+
+    path = os.path.realpath(path)
+    merged = merge_kubeconfig(load_kubeconfig(path), addition)
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    # mkstemp creates the file with 0600 permissions, matching az
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".config-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            yaml.safe_dump(merged, handle, default_flow_style=False)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class ARMClient:
+    """Resource Manager endpoint, tokens and pooled connections shared by a loader's threads."""
+
+    def __init__(self, run_az_command: Callable[..., Any]) -> None:
+        self.run_az_command = run_az_command
+        self._lock = threading.Lock()
+        self._endpoint: Optional[str] = None
+        self._access_tokens: Dict[str, str] = {}
+        self._pool_lock = threading.Lock()
+        self._connections: Dict[str, List["http.client.HTTPSConnection"]] = {}
+        self._ssl_context: Optional["ssl.SSLContext"] = None
+
+    def get_endpoint(self) -> Optional[str]:
+        """Get the Resource Manager endpoint of the active Azure cloud."""
+        with self._lock:
+            if self._endpoint is None:
+                result = self.run_az_command(["cloud", "show"], allow_in_dry_run=True)
+                if isinstance(result, dict):
+                    self._endpoint = result.get("endpoints", {}).get("resourceManager")
+            return self._endpoint
+
+    def get_access_token(
+        self, subscription_id: str, tenant_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Get an Azure CLI token for Resource Manager, cached per tenant when known."""
+        with self._lock:
+            cache_key = tenant_id or subscription_id
+            if cache_key not in self._access_tokens:
+                token_cmd = ["account", "get-access-token", "--subscription", subscription_id]
+                result = self.run_az_command(token_cmd, allow_in_dry_run=True)
+                if not isinstance(result, dict) or not result.get("accessToken"):
+                    return None
+                self._access_tokens[cache_key] = result["accessToken"]
+            return self._access_tokens[cache_key]
+
+    def get_ssl_context(self) -> "ssl.SSLContext":
+        """Get the TLS context for new connections, trusting the CA bundle az would use."""
+        from ssl import create_default_context
+
+        with self._pool_lock:
+            if self._ssl_context is None:
+                bundle = next(
+                    (os.environ[name] for name in CA_BUNDLE_VARIABLES if os.environ.get(name)),
+                    None,
+                )
+                if bundle and os.path.isdir(bundle):
+                    self._ssl_context = create_default_context(capath=bundle)
+                else:
+                    self._ssl_context = create_default_context(cafile=bundle)
+            return self._ssl_context
+
+    def connect(self, host: str) -> "http.client.HTTPSConnection":
+        """Open a connection to host, tunnelling through HTTPS_PROXY unless NO_PROXY excludes it."""
+        import base64
+        from http.client import HTTPSConnection
+        from urllib.request import getproxies, proxy_bypass
+
+        context = self.get_ssl_context()
+        proxy = getproxies().get("https")
+        hostname = urllib.parse.urlsplit(f"//{host}").hostname or host
+        if not proxy or proxy_bypass(hostname):
+            return HTTPSConnection(host, timeout=ARM_TIMEOUT_SECONDS, context=context)
+
+        proxy_url = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        connection = HTTPSConnection(
+            proxy_url.hostname or "",
+            proxy_url.port or 80,
+            timeout=ARM_TIMEOUT_SECONDS,
+            context=context,
+        )
+        tunnel_headers = {}
+        if proxy_url.username:
+            credentials = ":".join(
+                urllib.parse.unquote(part or "")
+                for part in (proxy_url.username, proxy_url.password)
+            )
+            encoded = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+            tunnel_headers["Proxy-Authorization"] = f"Basic {encoded}"
+        connection.set_tunnel(host, headers=tunnel_headers)
+        return connection
+
+    def send(
+        self,
+        host: str,
+        method: str,
+        url: str,
+        body: Optional[bytes],
+        headers: Dict[str, str],
+    ) -> Tuple[int, bytes]:
+        """Send a request over a pooled connection and return (status, body)."""
+
+        from http.client import HTTPException
+
+        def exchange(connection: "http.client.HTTPSConnection") -> Tuple[int, bytes]:
+            connection.request(method, url, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+
+        def release(connection: "http.client.HTTPSConnection") -> None:
+            with self._pool_lock:
+                idle = self._connections.setdefault(host, [])
+                if len(idle) < ARM_POOL_SIZE:
+                    idle.append(connection)
+                    return
+            connection.close()
+
+        with self._pool_lock:
+            idle = self._connections.get(host)
+            connection = idle.pop() if idle else None
+
+        # The server may have closed an idle connection, so a reused one gets one retry
+        if connection is not None:
+            try:
+                result = exchange(connection)
+                release(connection)
+                return result
+            except (OSError, HTTPException):
+                connection.close()
+
+        connection = self.connect(host)
+        try:
+            result = exchange(connection)
+        except (OSError, HTTPException):
+            connection.close()
+            raise
+        release(connection)
+        return result
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        with self._pool_lock:
+            idle = [conn for conns in self._connections.values() for conn in conns]
+            self._connections.clear()
+        for connection in idle:
+            connection.close()
 
 
 class AKSCredentialLoader:
-    def __init__(self, dry_run: bool = False, verbose: bool = False):
+    def __init__(
+        self,
+        dry_run: bool = False,
+        verbose: bool = False,
+        use_cli: bool = False,
+        *,
+        offline: bool = False,
+        az_bin: str = "az",
+        kubelogin_bin: str = "kubelogin",
+    ):
         self.dry_run = dry_run
         self.verbose = verbose
+        self.use_cli = use_cli
+        self.offline = offline
+        self.az_bin = az_bin
+        self.kubelogin_bin = kubelogin_bin
+        self.kubeconfig_path = DEFAULT_KUBECONFIG
+        self._kubeconfig_lock = threading.Lock()
+        # Looked up on each call, so run_az_command stubbed on the instance reaches the client too
+        # pylint: disable-next=unnecessary-lambda
+        self.arm = ARMClient(lambda *args, **kwargs: self.run_az_command(*args, **kwargs))
+        self._subscription_cache: Optional[List[Dict[str, Any]]] = None
+        self._subscription_tenants: Dict[str, str] = {}
         self.setup_logging()
 
+        # REST kubeconfigs can't be parsed without PyYAML, so az fetches them instead
+        if not use_cli and import_yaml() is None:
+            self.logger.warning("⚠️ PyYAML isn't installed - fetching credentials with az instead")
+            self.use_cli = True
+
     def setup_logging(self):
         """Configure logging based on verbosity level."""
         level = logging.DEBUG if self.verbose else logging.INFO
@@ -32,77 +388,197 @@ class AKSCredentialLoader:
         self.logger = logging.getLogger(__name__)
 
     def run_az_command(
-        self, command: List[str], capture_output: bool = True, allow_in_dry_run: bool = False
+        self, command: Sequence[str], capture_output: bool = True, allow_in_dry_run: bool = False
     ) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
-        """Execute an Azure CLI command and return the result."""
-        full_command = ["az"] + command
+        """Execute an Azure CLI command and return the result, retrying while throttled."""
+        full_command = [self.az_bin, *command]
 
         if self.dry_run and not allow_in_dry_run:
             self.logger.info("🔍 Would run: %s", " ".join(full_command))
             return None
 
-        try:
-            self.logger.debug("Executing: %s", " ".join(full_command))
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            try:
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("Executing: %s", " ".join(full_command))
 
-            if capture_output:
-                result = subprocess.run(full_command, capture_output=True, text=True, check=True)
-                if result.stdout.strip():
-                    parsed_result = json.loads(result.stdout)
-                    return parsed_result
+                if capture_output:
+                    # Raw bytes go straight to the JSON parser without a decode step
+                    result = subprocess.run(
+                        full_command, capture_output=True, check=True, **SUBPROCESS_KWARGS
+                    )
+                    return parse_json(result.stdout) if result.stdout.strip() else {}
+                # For commands that don't return JSON; output goes straight to the terminal
+                subprocess.run(full_command, check=True, **SUBPROCESS_KWARGS)
                 return {}
-            # For commands that don't return JSON (like get-credentials)
-            subprocess.run(full_command, check=True, text=True)
-            return {}
 
-        except subprocess.CalledProcessError as e:
-            self.logger.error("Command failed: %s", " ".join(full_command))
-            self.logger.error("Error details: %s", e.stderr if hasattr(e, "stderr") else str(e))
-            return None
-        except json.JSONDecodeError as e:
-            self.logger.error("Failed to parse JSON output from: %s", " ".join(full_command))
-            self.logger.error("Parse error: %s", str(e))
-            return None
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode("utf-8", errors="replace") if e.stderr else None
+                if attempt < MAX_THROTTLE_RETRIES and stderr and THROTTLE_PATTERN.search(stderr):
+                    delay = 2**attempt
+                    self.logger.warning("⏳ Azure is throttling requests, retrying in %ss", delay)
+                    time.sleep(delay)
+                    continue
+
+                self.logger.error("Command failed: %s", " ".join(full_command))
+                self.logger.error("Error details: %s", stderr if stderr is not None else str(e))
+                return None
+            except json.JSONDecodeError as e:
+                self.logger.error("Failed to parse JSON output from: %s", " ".join(full_command))
+                self.logger.error("Parse error: %s", str(e))
+                return None
+
+        return None
 
     def run_kubelogin_command(self, command: List[str]) -> bool:
         """Execute a kubelogin command."""
-        full_command = ["kubelogin"] + command
+        full_command = [self.kubelogin_bin] + command
 
         if self.dry_run:
             self.logger.info("🔍 Would run: %s", " ".join(full_command))
             return True
 
         try:
-            self.logger.debug("Executing: %s", " ".join(full_command))
-            subprocess.run(full_command, check=True, text=True, capture_output=True)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Executing: %s", " ".join(full_command))
+            # stdout is never read, so only stderr is captured and decoded on failure
+            subprocess.run(
+                full_command,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                **SUBPROCESS_KWARGS,
+            )
             return True
         except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode("utf-8", errors="replace") if e.stderr else None
             self.logger.error("Kubelogin command failed: %s", " ".join(full_command))
-            self.logger.error("Error details: %s", e.stderr if hasattr(e, "stderr") else str(e))
+            self.logger.error("Error details: %s", stderr if stderr is not None else str(e))
             return False
 
+    def close(self) -> None:
+        """Close the pooled ARM connections."""
+        self.arm.close()
+
+    def __enter__(self) -> "AKSCredentialLoader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def run_arm_request(
+        self, method: str, path: str, subscription_id: str, params: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """Call the Azure Resource Manager REST API as the Azure CLI user; return the JSON."""
+        from http.client import HTTPException
+
+        endpoint = self.arm.get_endpoint()
+        token = self.arm.get_access_token(
+            subscription_id, self._subscription_tenants.get(subscription_id)
+        )
+        if endpoint is None or token is None:
+            self.logger.error("❌ Can't authenticate to Azure Resource Manager")
+            return None
+
+        host = urllib.parse.urlsplit(endpoint).netloc
+        url = f"{path}?{urllib.parse.urlencode(params)}"
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        body = b"" if method == "POST" else None
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            self.logger.debug("Requesting: %s %s", method, path)
+            try:
+                status, data = self.arm.send(host, method, url, body, headers)
+            except (OSError, HTTPException) as e:
+                self.logger.error("Request failed: %s %s", method, path)
+                self.logger.error("Error details: %s", str(e))
+                return None
+
+            if status == 429 and attempt < MAX_THROTTLE_RETRIES:
+                delay = 2**attempt
+                self.logger.warning("⏳ Azure is throttling requests, retrying in %ss", delay)
+                time.sleep(delay)
+                continue
+
+            if status >= 400:
+                self.logger.error("Request failed: %s %s (%s)", method, path, status)
+                self.logger.error("Error details: %s", data.decode("utf-8", errors="replace"))
+                return None
+
+            try:
+                parsed_result: Dict[str, Any] = parse_json(data) if data.strip() else {}
+                return parsed_result
+            except json.JSONDecodeError as e:
+                self.logger.error("Failed to parse JSON response from: %s %s", method, path)
+                self.logger.error("Parse error: %s", str(e))
+                return None
+
+        return None
+
+    def get_cluster_kubeconfig(self, cluster: Cluster) -> Optional[Dict[str, Any]]:
+        """Get a cluster's user kubeconfig from the REST API, parsed."""
+        import base64
+
+        import yaml
+
+        cluster_name = cluster.name
+        path = (
+            f"/subscriptions/{urllib.parse.quote(cluster.subscription_id)}"
+            f"/resourceGroups/{urllib.parse.quote(cluster.resource_group)}"
+            "/providers/Microsoft.ContainerService/managedClusters"
+            f"/{urllib.parse.quote(cluster_name)}/listClusterUserCredential"
+        )
+        if self.dry_run:
+            self.logger.info("🔍 Would request: POST %s", path)
+            return None
+
+        params = {"api-version": AKS_API_VERSION, "format": "exec"}
+        result = self.run_arm_request("POST", path, cluster.subscription_id, params)
+        if result is None:
+            return None
+
+        kubeconfigs = result.get("kubeconfigs") or []
+        if not kubeconfigs:
+            self.logger.error("❌ No kubeconfig returned for %s", cluster_name)
+            return None
+
+        try:
+            kubeconfig = yaml.safe_load(base64.b64decode(kubeconfigs[0]["value"]))
+        except (KeyError, ValueError, yaml.YAMLError) as e:
+            self.logger.error("❌ Couldn't read kubeconfig for %s", cluster_name)
+            self.logger.error("Error details: %s", str(e))
+            return None
+        return kubeconfig if isinstance(kubeconfig, dict) else {}
+
     def get_subscriptions(
         self, subscription_filter: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
-        """Get list of Azure subscriptions."""
-        self.logger.info("🔍 Finding your Azure subscriptions...")
+        """Get list of Azure subscriptions, running `az account list` once per loader."""
+        if self._subscription_cache is None:
+            self.logger.info("🔍 Finding your Azure subscriptions...")
 
-        result = self.run_az_command(["account", "list"], allow_in_dry_run=True)
-        if result is None:
-            self.logger.error("❌ Couldn't get your subscriptions")
-            return []
+            result = self.run_az_command(["account", "list"], allow_in_dry_run=True)
+            if result is None:
+                self.logger.error("❌ Couldn't get your subscriptions")
+                return []
 
-        # Ensure we have a list of subscriptions
-        subscriptions: List[Dict[str, Any]] = result if isinstance(result, list) else []
+            # Ensure we have a list of subscriptions
+            self._subscription_cache = result if isinstance(result, list) else []
+            self._subscription_tenants = {
+                sub["id"]: sub["tenantId"]
+                for sub in self._subscription_cache
+                if sub.get("id") and sub.get("tenantId")
+            }
+
+        subscriptions: List[Dict[str, Any]] = list(self._subscription_cache)
 
         if subscription_filter:
-            # Filter subscriptions based on provided IDs
+            # Filter subscriptions based on provided IDs or names
+            filter_set = frozenset(subscription_filter)
             filtered_subs = [
                 sub
                 for sub in subscriptions
-                if (
-                    sub.get("id", "") in subscription_filter
-                    or sub.get("name", "") in subscription_filter
-                )
+                if sub.get("id", "") in filter_set or sub.get("name", "") in filter_set
             ]
             if not filtered_subs:
                 warning_msg = "⚠️ No subscriptions match your filter: %s"
@@ -115,79 +591,263 @@ class AKSCredentialLoader:
 
         return subscriptions
 
-    def get_aks_clusters(self, subscription_id: str) -> List[Dict[str, Any]]:
-        """Get all AKS clusters in a subscription."""
-        self.logger.info("🔎 Looking for AKS clusters...")
-
-        # Set the subscription context
-        set_cmd = ["account", "set", "--subscription", subscription_id]
-        result = self.run_az_command(set_cmd, capture_output=False, allow_in_dry_run=True)
-        if not result:
-            self.logger.error("❌ Can't access this subscription")
-            return []
+    def get_aks_clusters(self, subscription_id: str) -> List[Cluster]:
+        """Get all AKS clusters in a subscription; safe to call for several at once."""
+        self.logger.debug("🔎 Looking for AKS clusters in %s", subscription_id)
 
-        # Get AKS clusters
-        result = self.run_az_command(["aks", "list"], allow_in_dry_run=True)
+        list_cmd = ["aks", "list", "--subscription", subscription_id]
+        result = self.run_az_command(list_cmd, allow_in_dry_run=True)
         if result is None:
-            warning_msg = "⚠️ Couldn't list clusters in this subscription"
-            self.logger.warning(warning_msg)
+            warning_msg = "⚠️ Couldn't list clusters in subscription %s"
+            self.logger.warning(warning_msg, subscription_id)
             return []
 
         # Ensure we have a list of clusters
-        clusters: List[Dict[str, Any]] = result if isinstance(result, list) else []
+        rows = result if isinstance(result, list) else []
+        return [Cluster.from_json(subscription_id, row) for row in rows]
 
-        cluster_count = len(clusters)
-        if cluster_count == 0:
-            self.logger.info("📭 No clusters here")
-        else:
-            self.logger.info("🎯 Found %s cluster(s):", cluster_count)
-            for cluster in clusters:
-                self.logger.info("     %s", cluster.get("name", "Unknown"))
+    def ensure_resource_graph_extension(self) -> bool:
+        """Make sure the Azure CLI resource-graph extension is installed."""
+        installed = self.run_az_command(
+            ["extension", "list", "--query", "[?name=='resource-graph'].name"],
+            allow_in_dry_run=True,
+        )
+        if installed:
+            return True
+        if installed is None or self.dry_run:
+            return False
 
-        return clusters
+        self.logger.info("📦 Installing the Azure CLI resource-graph extension...")
+        add_cmd = ["extension", "add", "--name", "resource-graph", "--only-show-errors"]
+        return self.run_az_command(add_cmd, capture_output=False) is not None
 
-    def fetch_cluster_credentials(self, subscription_id: str, cluster: Dict[str, Any]) -> bool:
-        """Fetch credentials for a single AKS cluster."""
-        cluster_name = cluster.get("name", "Unknown")
-        resource_group = cluster.get("resourceGroup", "Unknown")
+    def discover_all_clusters(
+        self, subscription_ids: List[str]
+    ) -> Optional[Dict[str, List[Cluster]]]:
+        """Find AKS clusters with one Resource Graph query; None if it can't run."""
+        if not self.ensure_resource_graph_extension():
+            return None
 
-        self.logger.info("🔑 Getting credentials for: %s", cluster_name)
+        clusters_by_subscription: Dict[str, List[Cluster]] = {
+            subscription_id: [] for subscription_id in subscription_ids
+        }
+        # Resource Graph reports subscription IDs in lower case
+        lookup = {subscription_id.lower(): subscription_id for subscription_id in subscription_ids}
 
-        # Set subscription context
-        set_cmd = ["account", "set", "--subscription", subscription_id]
-        if not self.run_az_command(set_cmd, capture_output=False):
-            if not self.dry_run:
-                self.logger.error("❌ Can't switch to subscription")
-                return False
+        query_cmd = [
+            "graph",
+            "query",
+            "-q",
+            AKS_GRAPH_QUERY,
+            "--first",
+            str(GRAPH_PAGE_SIZE),
+            "--subscriptions",
+            *subscription_ids,
+        ]
+        skip_token: Optional[str] = None
+        while True:
+            page_cmd = query_cmd + ["--skip-token", skip_token] if skip_token else query_cmd
+            result = self.run_az_command(page_cmd, allow_in_dry_run=True)
+            if not isinstance(result, dict):
+                return None
+
+            for row in result.get("data", []):
+                subscription_id = lookup.get(str(row.get("subscriptionId", "")).lower())
+                if subscription_id is not None:
+                    cluster = Cluster.from_json(subscription_id, row)
+                    clusters_by_subscription[subscription_id].append(cluster)
+
+            skip_token = result.get("skip_token")
+            if not skip_token:
+                return clusters_by_subscription
+
+    def iter_clusters(
+        self, subscriptions: List[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, Optional[List[Cluster]]]]:
+        """Yield (subscription ID, clusters) as each is listed; clusters is None if skipped."""
+        subscription_ids = [sub.get("id", "Unknown") for sub in subscriptions]
+        if not subscription_ids:
+            return
+        if self.offline:
+            self.logger.info("📴 Offline - skipping cluster discovery")
+            yield from ((subscription_id, None) for subscription_id in subscription_ids)
+            return
+
+        self.logger.info("🔎 Looking for AKS clusters...")
+
+        remaining = subscription_ids
+        if len(subscription_ids) > 1:
+            # The query only sees the tenant az is signed in to, not every tenant listed
+            default_tenant = next(
+                (
+                    sub.get("tenantId")
+                    for sub in self._subscription_cache or []
+                    if sub.get("isDefault")
+                ),
+                None,
+            )
+            graph_ids = [
+                subscription_id
+                for subscription_id in subscription_ids
+                if self._subscription_tenants.get(subscription_id, default_tenant) == default_tenant
+            ]
+            graph_result = self.discover_all_clusters(graph_ids) if graph_ids else None
+            if graph_result is not None:
+                yield from graph_result.items()
+                remaining = [sid for sid in subscription_ids if sid not in graph_result]
+            # A preview costs at most one query, so it doesn't list subscriptions one by one
+            if remaining and self.dry_run:
+                warning_msg = (
+                    "⚠️ Resource Graph unavailable - previewing %s subscription(s) without clusters"
+                )
+                self.logger.warning(warning_msg, len(remaining))
+                yield from ((subscription_id, None) for subscription_id in remaining)
+                return
+            if remaining:
+                self.logger.debug("Listing %s subscription(s) one by one", len(remaining))
+
+        if not remaining:
+            return
+
+        max_workers = min(MAX_DISCOVERY_WORKERS, len(remaining))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures: Dict[Future, str] = {}
+            for subscription_id in remaining:
+                futures[executor.submit(self.get_aks_clusters, subscription_id)] = subscription_id
+
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def discover_clusters(
+        self, subscriptions: List[Dict[str, Any]]
+    ) -> Dict[str, Optional[List[Cluster]]]:
+        """Find AKS clusters, keyed by subscription ID; None where not looked up."""
+        return dict(self.iter_clusters(subscriptions))
+
+    def fetch_cluster_credentials(
+        self, cluster: Cluster, kubeconfig_file: Optional[str] = None
+    ) -> bool:
+        """Fetch a cluster's credentials with az, into kubeconfig_file if given."""
+        cluster_name = cluster.name
+
+        self.logger.info("🔑 Getting credentials for: %s", cluster_name)
 
         # Get AKS credentials
-        get_creds_result = self.run_az_command(
-            [
-                "aks",
-                "get-credentials",
-                "--resource-group",
-                resource_group,
-                "--name",
-                cluster_name,
-                "--overwrite-existing",
-            ],
-            capture_output=False,
-        )
+        get_creds_cmd: Sequence[str] = cluster.get_credentials_args
+        if kubeconfig_file:
+            get_creds_cmd = (*get_creds_cmd, "--file", kubeconfig_file)
+
+        # Output is captured so throttling errors can be detected and retried
+        get_creds_result = self.run_az_command(get_creds_cmd)
 
-        if get_creds_result is None:
+        if get_creds_result is None and not self.dry_run:
             self.logger.error("❌ Failed to get credentials for %s", cluster_name)
             return False
 
-        # Convert kubeconfig to use Azure CLI authentication
-        if not self.run_kubelogin_command(["convert-kubeconfig", "-l", "azurecli"]):
-            self.logger.error("❌ kubelogin setup failed for %s", cluster_name)
+        self.logger.info("✅ Ready: %s", cluster_name)
+        return True
+
+    def merge_credentials(self, cluster_name: str, addition: Dict[str, Any]) -> bool:
+        """Merge a cluster's kubeconfig into the default one; merges are serialized."""
+        import yaml
+
+        try:
+            with self._kubeconfig_lock:
+                write_merged_kubeconfig(self.kubeconfig_path, addition)
+        except (OSError, yaml.YAMLError) as e:
+            self.logger.error("❌ Failed to merge kubeconfig for %s", cluster_name)
+            self.logger.error("Error details: %s", str(e))
+            return False
+        return True
+
+    def fetch_and_merge_credentials(self, cluster: Cluster) -> bool:
+        """Fetch a cluster's credentials and merge them into the default kubeconfig."""
+        if self.use_cli:
+            return self.fetch_and_merge_cli_credentials(cluster)
+
+        cluster_name = cluster.name
+
+        self.logger.info("🔑 Getting credentials for: %s", cluster_name)
+
+        # In dry-run mode the request is only previewed
+        kubeconfig = self.get_cluster_kubeconfig(cluster)
+        if kubeconfig is None and not self.dry_run:
+            self.logger.error("❌ Failed to get credentials for %s", cluster_name)
+            return False
+
+        if kubeconfig is not None and not self.merge_credentials(
+            cluster_name, convert_kubeconfig_to_azurecli(kubeconfig)
+        ):
             return False
 
         self.logger.info("✅ Ready: %s", cluster_name)
         return True
 
-    def load_all_credentials(self, subscription_filter: Optional[List[str]] = None) -> None:
-        """Main method to load credentials for all AKS clusters."""
+    def fetch_and_merge_cli_credentials(self, cluster: Cluster) -> bool:
+        """Fetch a cluster's credentials with az into a private kubeconfig, then merge it."""
+        import tempfile
+
+        import yaml
+
+        if self.dry_run:
+            return self.fetch_cluster_credentials(cluster)
+
+        # Concurrent az calls writing the same kubeconfig would lose each other's updates
+        cluster_name = cluster.name
+        with tempfile.TemporaryDirectory(prefix="aks-credential-loader-") as temp_dir:
+            cluster_kubeconfig = os.path.join(temp_dir, "config")
+            if not self.fetch_cluster_credentials(cluster, cluster_kubeconfig):
+                return False
+
+            try:
+                addition = load_kubeconfig(cluster_kubeconfig)
+            except (OSError, yaml.YAMLError) as e:
+                self.logger.error("❌ Failed to merge kubeconfig for %s", cluster_name)
+                self.logger.error("Error details: %s", str(e))
+                return False
+            return self.merge_credentials(cluster_name, addition)
+
+    def fetches_concurrently(self) -> bool:
+        """Whether fetch_all_credentials fetches clusters from worker threads."""
+        # Without PyYAML only use_cli can run, and az must merge one cluster at a time
+        return not self.dry_run and import_yaml() is not None
+
+    def fetch_all_credentials(self, clusters: Iterable[Cluster]) -> int:
+        """Fetch credentials for clusters as they are produced; return the success count."""
+        # Only use_cli gets this far without PyYAML; az then merges into the default kubeconfig
+        fetch = (
+            self.fetch_and_merge_credentials
+            if import_yaml() is not None
+            else self.fetch_cluster_credentials
+        )
+        if self.fetches_concurrently():
+            # Throttling is handled by backing off in run_az_command and run_arm_request
+            with ThreadPoolExecutor(max_workers=MAX_CREDENTIAL_WORKERS) as executor:
+                futures = [executor.submit(fetch, cluster) for cluster in clusters]
+                successful = sum(1 for future in as_completed(futures) if future.result())
+        else:
+            successful = sum(1 for cluster in clusters if fetch(cluster))
+
+        # REST kubeconfigs are converted in-process before merging
+        if not self.use_cli:
+            return successful
+
+        # Convert kubeconfig to use Azure CLI authentication
+        kubelogin_cmd = [
+            "convert-kubeconfig",
+            "-l",
+            "azurecli",
+            "--kubeconfig",
+            self.kubeconfig_path,
+        ]
+        if successful and not self.run_kubelogin_command(kubelogin_cmd):
+            self.logger.error("❌ kubelogin setup failed")
+            return 0
+
+        return successful
+
+    def load_all_credentials(self, subscription_filter: Optional[List[str]] = None) -> bool:
+        """Main method to load credentials for all AKS clusters; False if it couldn't start."""
         self.logger.info("🚀 Starting Azure Kubernetes Credential Loader")
 
         if self.dry_run:
@@ -197,39 +857,64 @@ class AKSCredentialLoader:
         subscriptions = self.get_subscriptions(subscription_filter)
         if not subscriptions:
             self.logger.error("❌ No subscriptions found or accessible")
-            return
+            return False
 
+        subscription_names = {
+            sub.get("id", "Unknown"): sub.get("name", "Unknown") for sub in subscriptions
+        }
         total_clusters = 0
-        successful_clusters = 0
+        not_looked_up = 0
+        # Worker threads log while later subscriptions are listed, so sections would mix them up
+        concurrent = self.fetches_concurrently()
+
+        def discovered() -> Iterator[Cluster]:
+            """Report each subscription's clusters and hand them on for fetching."""
+            nonlocal total_clusters, not_looked_up
+            for subscription_id, clusters in self.iter_clusters(subscriptions):
+                subscription_name = subscription_names.get(subscription_id, "Unknown")
+                if concurrent and clusters is not None:
+                    total_clusters += len(clusters)
+                    self.logger.info("🏢 %s: %s cluster(s)", subscription_name, len(clusters))
+                    yield from clusters
+                    continue
+
+                self.logger.info("\n%s", "=" * 60)
+                self.logger.info("🏢 %s", subscription_name)
+                self.logger.info("%s", "=" * 60)
 
-        # Process each subscription
-        for subscription in subscriptions:
-            subscription_id = subscription.get("id", "Unknown")
-            subscription_name = subscription.get("name", "Unknown")
+                # Only previews skip the lookup, and they always run serially
+                if clusters is None:
+                    not_looked_up += 1
+                    self.logger.info("❔ Clusters not looked up")
+                    continue
 
-            self.logger.info("\n%s", "=" * 60)
-            self.logger.info("🏢 %s", subscription_name)
-            self.logger.info("%s", "=" * 60)
+                if not clusters:
+                    self.logger.info("📭 No clusters here")
+                    continue
 
-            # Get clusters in this subscription
-            clusters = self.get_aks_clusters(subscription_id)
-            total_clusters += len(clusters)
+                self.logger.info("🎯 Found %s cluster(s):", len(clusters))
+                for cluster in clusters:
+                    self.logger.info("     %s", cluster.name)
 
-            # Fetch credentials for each cluster
-            for cluster in clusters:
-                if self.fetch_cluster_credentials(subscription_id, cluster):
-                    successful_clusters += 1
+                total_clusters += len(clusters)
+                yield from clusters
 
-                # Small delay to avoid overwhelming Azure API
-                if not self.dry_run:
-                    time.sleep(1)
+        # Credentials are fetched while the remaining subscriptions are listed
+        successful_clusters = self.fetch_all_credentials(discovered())
 
         # Summary
         self.logger.info("\n%s", "=" * 60)
         self.logger.info("📊 Summary")
         self.logger.info("%s", "=" * 60)
         self.logger.info("Subscriptions: %s", len(subscriptions))
-        self.logger.info("Clusters found: %s", total_clusters)
+        self.logger.info(
+            "Clusters found: %s",
+            (
+                f"not looked up in {not_looked_up} subscription(s)"
+                if not_looked_up
+                else total_clusters
+            ),
+        )
 
         if self.dry_run:
             self.logger.info("🔍 Preview completed - no changes made")
@@ -243,8 +928,13 @@ class AKSCredentialLoader:
             else:
                 self.logger.info("📭 No clusters found")
 
+        return True
+
 
 def main():
+    # Only needed on the command line, so importing the module as a library skips it
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Automatically fetch AKS credentials from all Azure subscriptions",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -252,6 +942,7 @@ def main():
 Examples:
   %(prog)s                          # Process all subscriptions
   %(prog)s --dry-run                # Preview actions without executing
+  %(prog)s --dry-run --offline      # Preview without looking up clusters
   %(prog)s --subscription sub1 sub2 # Process specific subscriptions
   %(prog)s --verbose                # Enable debug logging
         """,
@@ -267,20 +958,42 @@ Examples:
         "--subscription", "-s", nargs="+", help="Process only specific subscription IDs or names"
     )
 
+    parser.add_argument(
+        "--use-cli",
+        action="store_true",
+        help="Fetch credentials with 'az aks get-credentials' instead of the REST API",
+    )
+
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="With --dry-run, preview without looking up clusters in Azure",
+    )
+
     args = parser.parse_args()
+    if args.offline and not args.dry_run:
+        parser.error("--offline can only be used with --dry-run")
 
-    # Check prerequisites
+    # Check prerequisites, resolving each tool's path once for every later call
     print("🔧 Checking prerequisites...")
+    az_bin = shutil.which("az")
     try:
-        subprocess.run(["az", "--version"], capture_output=True, check=True)
+        if az_bin is None:
+            raise FileNotFoundError("az")
+        subprocess.run([az_bin, "--version"], capture_output=True, check=True, **SUBPROCESS_KWARGS)
         print("✅ Azure CLI found")
     except (subprocess.CalledProcessError, FileNotFoundError):
         print("❌ Azure CLI not found - please install it first")
         print("   Install guide: https://docs.microsoft.com/en-us/cli/azure/install-azure-cli")
         sys.exit(1)
 
+    kubelogin_bin = shutil.which("kubelogin")
     try:
-        subprocess.run(["kubelogin", "--version"], capture_output=True, check=True)
+        if kubelogin_bin is None:
+            raise FileNotFoundError("kubelogin")
+        subprocess.run(
+            [kubelogin_bin, "--version"], capture_output=True, check=True, **SUBPROCESS_KWARGS
+        )
         print("✅ kubelogin found")
     except (subprocess.CalledProcessError, FileNotFoundError):
         print("❌ kubelogin not found - please install it first")
@@ -294,8 +1007,16 @@ Examples:
     print("🚀 Azure Kubernetes Credential Loader")
     print("=" * 70)
 
-    loader = AKSCredentialLoader(dry_run=args.dry_run, verbose=args.verbose)
-    loader.load_all_credentials(subscription_filter=args.subscription)
+    with AKSCredentialLoader(
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        use_cli=args.use_cli,
+        offline=args.offline,
+        az_bin=az_bin,
+        kubelogin_bin=kubelogin_bin,
+    ) as loader:
+        if not loader.load_all_credentials(subscription_filter=args.subscription):
+            sys.exit(1)
 
     print("\n🎉 All done!")
     if not args.dry_run:
@@ -1,8 +1,188 @@
-# Test configuration for proper imports
-import sys
-import os
-
-# Add src to Python path for test imports
-_src_path = os.path.join(os.path.dirname(__file__), "..", "src")
-if _src_path not in sys.path:
-    sys.path.insert(0, _src_path)
+# Shared test fixtures; src is put on the import path by the pytest config
+import subprocess
+from types import MappingProxyType
+from typing import Callable, Iterator, List, Mapping, Optional, Tuple
+from unittest.mock import Mock
+
+import pytest
+
+from aks_credential_loader import CA_BUNDLE_VARIABLES, AKSCredentialLoader, Cluster
+
+
+@pytest.fixture(scope="class", autouse=True)
+def _block_subprocess() -> Iterator[Mock]:
+    """Swap subprocess.run for a Mock once per test class"""
+    with pytest.MonkeyPatch.context() as patcher:
+        blocked = Mock()
+        patcher.setattr(subprocess, "run", blocked)
+        yield blocked
+
+
+@pytest.fixture(autouse=True)
+def _no_subprocess(_block_subprocess: Mock) -> Mock:
+    """Fail any test that would run a real az or kubelogin process"""
+    _block_subprocess.reset_mock(return_value=True, side_effect=True)
+    _block_subprocess.side_effect = AssertionError("unmocked subprocess.run")
+    return _block_subprocess
+
+
+@pytest.fixture
+def mock_subprocess(_no_subprocess: Mock) -> Mock:
+    """Let a test run subprocess.run, returning the Mock that stands in for it"""
+    _no_subprocess.side_effect = None
+    return _no_subprocess
+
+
+# Loaders are shared by the tests of a class. Tests that fill a loader's caches
+# (subscriptions, tokens, ARM endpoint or connections) must use the
+# function-scoped fresh_prod_loader instead, and settings are changed through
+# monkeypatch so they are restored.
+@pytest.fixture(scope="class")
+def loader() -> AKSCredentialLoader:
+    """Create a dry-run, verbose instance of AKSCredentialLoader"""
+    return AKSCredentialLoader(dry_run=True, verbose=True)
+
+
+@pytest.fixture(scope="class")
+def prod_loader() -> AKSCredentialLoader:
+    """Create a production mode instance for testing"""
+    return AKSCredentialLoader(dry_run=False, verbose=False)
+
+
+@pytest.fixture
+def patched_loader(
+    prod_loader: AKSCredentialLoader, monkeypatch: pytest.MonkeyPatch
+) -> AKSCredentialLoader:
+    """Production loader whose run_az_command and run_kubelogin_command are Mocks
+
+    Tests configure the Mocks through the loader's attributes; they are restored
+    after each test, so the shared instance stays clean.
+    """
+    monkeypatch.setattr(prod_loader, "run_az_command", Mock(return_value={}))
+    monkeypatch.setattr(prod_loader, "run_kubelogin_command", Mock(return_value=True))
+    return prod_loader
+
+
+@pytest.fixture
+def fresh_prod_loader() -> AKSCredentialLoader:
+    """Create a production mode instance that no other test has used"""
+    return AKSCredentialLoader(dry_run=False, verbose=False)
+
+
+@pytest.fixture
+def arm_env(monkeypatch: pytest.MonkeyPatch) -> pytest.MonkeyPatch:
+    """Clear the proxy and CA bundle settings ARM connections read, for a test to set its own"""
+    for name in ("HTTPS_PROXY", "https_proxy", "NO_PROXY", "no_proxy", *CA_BUNDLE_VARIABLES):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+@pytest.fixture(params=[(True, True), (False, False)], ids=["dry", "prod"])
+def any_loader(request: pytest.FixtureRequest) -> AKSCredentialLoader:
+    """Create a loader in each mode, for behaviour that shouldn't depend on it"""
+    dry_run, verbose = request.param
+    return AKSCredentialLoader(dry_run=dry_run, verbose=verbose)
+
+
+# The mock data is built once per session (per worker under xdist) and is
+# read-only, so no test can change what the next one sees. Wrap it in list(...)
+# where code under test expects az's JSON lists.
+@pytest.fixture(scope="session")
+def mock_subscriptions() -> Tuple[Mapping[str, str], ...]:
+    """Mock subscription data"""
+    return (
+        MappingProxyType(
+            {
+                "id": "12345678-1234-1234-1234-123456789abc",
+                "name": "mock-subscription-01",
+                "state": "Enabled",
+            }
+        ),
+        MappingProxyType(
+            {
+                "id": "123e4567-e89b-12d3-a456-426614174000",
+                "name": "test-subscription",
+                "state": "Enabled",
+            }
+        ),
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_clusters() -> Tuple[Mapping[str, str], ...]:
+    """Mock AKS cluster data"""
+    return (
+        MappingProxyType(
+            {
+                "name": "mock-aks-cluster-01",
+                "resourceGroup": "mock-resource-group-01",
+                "location": "eastus",
+            }
+        ),
+        MappingProxyType(
+            {"name": "test-cluster", "resourceGroup": "test-rg", "location": "westus2"}
+        ),
+    )
+
+
+@pytest.fixture
+def pending_clusters(mock_clusters: Tuple[Mapping[str, str], ...]) -> List[Cluster]:
+    """Two mock clusters in different subscriptions, waiting for their credentials"""
+    return [
+        Cluster.from_json("sub-1", mock_clusters[0]),
+        Cluster.from_json("sub-2", mock_clusters[1]),
+    ]
+
+
+@pytest.fixture
+def stub_discovery(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_subscriptions: Tuple[Mapping[str, str], ...],
+    mock_clusters: Tuple[Mapping[str, str], ...],
+) -> Callable[..., Mock]:
+    """Stub a loader's subscription and cluster lookups with the mock data
+
+    Resource Graph is unavailable, so each subscription is listed with the
+    returned get_aks_clusters Mock; list_clusters replaces what it returns.
+    """
+
+    def stub(
+        target: AKSCredentialLoader, list_clusters: Optional[Callable[[str], list]] = None
+    ) -> Mock:
+        def every_cluster(subscription_id: str) -> List[Cluster]:
+            return [Cluster.from_json(subscription_id, row) for row in mock_clusters]
+
+        mock_list = Mock(side_effect=list_clusters or every_cluster)
+        monkeypatch.setattr(
+            target, "get_subscriptions", Mock(return_value=list(mock_subscriptions))
+        )
+        monkeypatch.setattr(target, "discover_all_clusters", Mock(return_value=None))
+        monkeypatch.setattr(target, "get_aks_clusters", mock_list)
+        return mock_list
+
+    return stub
+
+
+@pytest.fixture
+def record_fetches(monkeypatch: pytest.MonkeyPatch) -> Callable[..., List[Cluster]]:
+    """Replace a loader's fetch_all_credentials with one recording the clusters it gets
+
+    on_fetch is called with each cluster as discovery hands it over.
+    """
+
+    def record(
+        target: AKSCredentialLoader, on_fetch: Optional[Callable[[Cluster], None]] = None
+    ) -> List[Cluster]:
+        fetched: List[Cluster] = []
+
+        def fetch_all(clusters: List[Cluster]) -> int:
+            for cluster in clusters:
+                fetched.append(cluster)
+                if on_fetch is not None:
+                    on_fetch(cluster)
+            return len(fetched)
+
+        monkeypatch.setattr(target, "fetch_all_credentials", fetch_all)
+        return fetched
+
+    return record
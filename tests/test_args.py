@@ -0,0 +1,39 @@
+"""Tests for command-line argument parsing of Azure Kubernetes Credential Loader."""
+
+# type: ignore[misc,unused-ignore,no-untyped-def]
+
+import argparse
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def argparser() -> argparse.ArgumentParser:
+    """Parser similar to the one in main(); parse_args doesn't change it, so it is shared"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    parser.add_argument("--subscription", "-s", nargs="+")
+    return parser
+
+
+class TestArgumentParsing:
+    """Test command-line argument parsing"""
+
+    def test_argument_parsing_defaults(self, argparser: argparse.ArgumentParser) -> None:
+        """Test default argument values"""
+        args = argparser.parse_args([])
+        assert args.dry_run is False
+        assert args.verbose is False
+        assert args.subscription is None
+
+    def test_argument_parsing_with_options(self, argparser: argparse.ArgumentParser) -> None:
+        """Test argument parsing with options"""
+        args = argparser.parse_args(["--dry-run", "--verbose", "--subscription", "sub1", "sub2"])
+        assert args.dry_run is True
+        assert args.verbose is True
+        assert args.subscription == ["sub1", "sub2"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+"""Tests for the command-line entry point of Azure Kubernetes Credential Loader."""
+
+# type: ignore[misc,unused-ignore,no-untyped-def,attr-defined,arg-type,return-value,call-arg]
+# pylint: disable=import-error,import-outside-toplevel
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
+
+
+class TestMainFunction:
+    """Test the main function"""
+
+    @patch("aks_credential_loader.shutil.which", side_effect=lambda name: f"/usr/bin/{name}")
+    @patch("aks_credential_loader.AKSCredentialLoader")
+    def test_main_function_prerequisites_success(
+        self, mock_loader_class: Mock, mock_which: Mock, mock_subprocess: Mock
+    ) -> None:
+        """Test main function with successful prerequisites check"""
+        # Mock subprocess calls for prerequisite checks
+        mock_subprocess.return_value = SimpleNamespace(stdout=b"", returncode=0)
+
+        # Mock the loader instance, which main uses as a context manager
+        mock_loader = MagicMock()
+        mock_loader_class.return_value.__enter__.return_value = mock_loader
+
+        # Import and test main function
+        from aks_credential_loader import main
+
+        # Mock sys.argv for argument parsing
+        with patch("sys.argv", ["aks_credential_loader.py", "--dry-run"]):
+            main()
+
+        # Verify loader was created and called
+        mock_loader_class.assert_called_once_with(
+            dry_run=True,
+            verbose=False,
+            use_cli=False,
+            offline=False,
+            az_bin="/usr/bin/az",
+            kubelogin_bin="/usr/bin/kubelogin",
+        )
+        mock_loader.load_all_credentials.assert_called_once()
+        mock_subprocess.assert_any_call(
+            ["/usr/bin/az", "--version"], capture_output=True, check=True
+        )
+
+    @patch("aks_credential_loader.shutil.which", side_effect=lambda name: f"/usr/bin/{name}")
+    @patch("aks_credential_loader.AKSCredentialLoader")
+    def test_main_function_load_failure(
+        self, mock_loader_class: Mock, mock_which: Mock, mock_subprocess: Mock
+    ) -> None:
+        """Test main exits non-zero when the loader couldn't run"""
+        mock_subprocess.return_value = SimpleNamespace(stdout=b"", returncode=0)
+        mock_loader = mock_loader_class.return_value.__enter__.return_value
+        mock_loader.load_all_credentials.return_value = False
+
+        from aks_credential_loader import main
+
+        with patch("sys.argv", ["aks_credential_loader.py"]), pytest.raises(SystemExit) as exc:
+            main()
+
+        assert exc.value.code == 1
+        mock_loader_class.return_value.__exit__.assert_called_once()
+
+    @patch("aks_credential_loader.shutil.which", side_effect=lambda name: f"/usr/bin/{name}")
+    @patch("aks_credential_loader.AKSCredentialLoader")
+    def test_main_function_passes_flags(
+        self, mock_loader_class: Mock, mock_which: Mock, mock_subprocess: Mock
+    ) -> None:
+        """Test --use-cli and --offline reach the loader"""
+        mock_subprocess.return_value = SimpleNamespace(stdout=b"", returncode=0)
+        from aks_credential_loader import main
+
+        argv = ["aks_credential_loader.py", "--dry-run", "--offline", "--use-cli"]
+        with patch("sys.argv", argv):
+            main()
+
+        mock_loader_class.assert_called_once_with(
+            dry_run=True,
+            verbose=False,
+            use_cli=True,
+            offline=True,
+            az_bin="/usr/bin/az",
+            kubelogin_bin="/usr/bin/kubelogin",
+        )
+
+    @patch("aks_credential_loader.AKSCredentialLoader")
+    def test_main_function_offline_needs_dry_run(
+        self, mock_loader_class: Mock, mock_subprocess: Mock, capsys
+    ) -> None:
+        """Test --offline without --dry-run is rejected before anything runs"""
+        from aks_credential_loader import main
+
+        argv = ["aks_credential_loader.py", "--offline"]
+        with patch("sys.argv", argv), pytest.raises(SystemExit) as exc:
+            main()
+
+        assert exc.value.code == 2
+        assert "--offline can only be used with --dry-run" in capsys.readouterr().err
+        mock_subprocess.assert_not_called()
+        mock_loader_class.assert_not_called()
+
+    @patch("aks_credential_loader.shutil.which", return_value=None)
+    @patch("aks_credential_loader.AKSCredentialLoader")
+    def test_main_function_missing_az(
+        self, mock_loader_class: Mock, mock_which: Mock, mock_subprocess: Mock
+    ) -> None:
+        """Test main exits when az is not on PATH"""
+        from aks_credential_loader import main
+
+        with patch("sys.argv", ["aks_credential_loader.py"]), pytest.raises(SystemExit):
+            main()
+
+        mock_subprocess.assert_not_called()
+        mock_loader_class.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])